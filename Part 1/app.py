@@ -1,19 +1,42 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, Response
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import QueuePool
+from werkzeug.exceptions import HTTPException
 from typing import Dict, Any, Optional
-from marshmallow import Schema, fields, ValidationError
+from pydantic import BaseModel, Field, ValidationError
 import logging
-from datetime import datetime
+import orjson
+import sqlite3
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///inventory.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Keep a pool of open SQLite connections instead of opening/closing the
+# database file on every request
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'poolclass': QueuePool,
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_pre_ping': True,
+    'connect_args': {'check_same_thread': False},
+}
 
 # Initialize database
 db = SQLAlchemy(app)
 
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Enable WAL and relaxed sync on each pooled connection so readers
+    and the writer don't serialize on the database file."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")
+    cursor.close()
+
 # Database Models
 class Product(db.Model):
     __tablename__ = 'products'
@@ -23,10 +46,13 @@ class Product(db.Model):
     sku = db.Column(db.String(100), unique=True, nullable=False)
     price = db.Column(db.Numeric(10, 2), nullable=False)
     supplier_id = db.Column(db.Integer, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Server-side default: the DB stamps the row, no Python datetime call
+    # or extra bound parameter per insert
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
     
-    # Relationship with inventory
-    inventories = db.relationship('Inventory', backref='product', lazy=True)
+    # Relationship with inventory; selectin loads all inventories for the
+    # products in a result set with one extra query instead of one per product
+    inventories = db.relationship('Inventory', back_populates='product', lazy='selectin')
 
 class Inventory(db.Model):
     __tablename__ = 'inventory'
@@ -35,8 +61,11 @@ class Inventory(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     warehouse_id = db.Column(db.Integer, nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=0)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+    updated_at = db.Column(db.DateTime, server_default=db.func.current_timestamp(),
+                           onupdate=db.func.current_timestamp())
+
+    product = db.relationship('Product', back_populates='inventories')
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -55,55 +84,72 @@ ERROR_SKU_EXISTS = "SKU already exists"
 ERROR_DATABASE = "Database error occurred"
 SUCCESS_PRODUCT_CREATED = "Product created successfully"
 
-# API Response structure
-def create_response(success: bool, data: Optional[Dict] = None, error: Optional[str] = None, status_code: int = HTTP_200_OK) -> tuple:
+# API Response structure; orjson writes straight to bytes and is much
+# faster than the stdlib encoder behind jsonify
+def create_response(success: bool, data: Optional[Dict] = None, error: Optional[str] = None, status_code: int = HTTP_200_OK) -> Response:
     response = {
         "success": success,
         "data": data or {},
     }
     if error:
         response["error"] = error
-    return jsonify(response), status_code
-
-# Custom validation functions
-def validate_non_negative(value):
-    if value < 0:
-        raise ValidationError('Must be non-negative')
-
-def validate_positive_price(value):
-    if value <= 0:
-        raise ValidationError('Price must be greater than 0')
-
-# Product Schema
-class ProductSchema(Schema):
-    name = fields.Str(required=True, validate=fields.Length(min=1, max=255))
-    sku = fields.Str(required=True, validate=fields.Length(min=1, max=100))
-    price = fields.Float(required=True, validate=validate_positive_price)
-    warehouse_id = fields.Int(required=True, validate=lambda x: x > 0)
-    initial_quantity = fields.Int(required=True, validate=validate_non_negative)
-    supplier_id = fields.Int(allow_none=True, validate=lambda x: x is None or x > 0)
-
-product_schema = ProductSchema()
+    return Response(
+        orjson.dumps(response, option=orjson.OPT_NAIVE_UTC),
+        status=status_code,
+        mimetype='application/json'
+    )
+
+# Product input model; pydantic v2 compiles the validators into its Rust
+# core at import time, and model_validate_json parses the raw bytes
+# without a separate stdlib json pass. Unknown keys are ignored.
+class ProductIn(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    sku: str = Field(min_length=1, max_length=100)
+    price: float = Field(gt=0)
+    warehouse_id: int = Field(ge=1)
+    initial_quantity: int = Field(ge=0)
+    supplier_id: Optional[int] = Field(default=None, ge=1)
+
+def is_unique_violation(error: IntegrityError) -> bool:
+    """Check the driver's error code instead of substring-scanning the
+    rendered error message."""
+    orig = getattr(error, 'orig', None)
+    return (getattr(orig, 'sqlite_errorcode', 0) == sqlite3.SQLITE_CONSTRAINT_UNIQUE
+            or getattr(orig, 'pgcode', None) == '23505')  # Postgres unique_violation
 
 # Error handlers
 @app.errorhandler(ValidationError)
 def handle_validation_error(error):
-    logger.error(f"Validation error: {error.messages}")
-    return create_response(False, error=str(error.messages), status_code=HTTP_400_BAD_REQUEST)
+    messages = {
+        '.'.join(str(loc) for loc in err['loc']) or 'body': err['msg']
+        for err in error.errors()
+    }
+    logger.error("Validation error: %s", messages)
+    return create_response(False, error=str(messages), status_code=HTTP_400_BAD_REQUEST)
 
 @app.errorhandler(IntegrityError)
 def handle_integrity_error(error):
-    logger.error(f"Database integrity error: {str(error)}")
-    if 'UNIQUE constraint' in str(error.orig) or 'duplicate key' in str(error.orig):
+    db.session.rollback()
+    logger.error("Database integrity error: %s", error)
+    if is_unique_violation(error):
         return create_response(False, error=ERROR_SKU_EXISTS, status_code=HTTP_400_BAD_REQUEST)
     return create_response(False, error=ERROR_DATABASE, status_code=HTTP_500_INTERNAL_SERVER_ERROR)
 
+@app.errorhandler(Exception)
+def handle_unexpected_error(error):
+    # Let normal HTTP errors (404, 405, ...) pass through untouched
+    if isinstance(error, HTTPException):
+        return error
+    db.session.rollback()
+    logger.error("Unexpected error: %s", error)
+    return create_response(False, error=ERROR_DATABASE, status_code=HTTP_500_INTERNAL_SERVER_ERROR)
+
 @app.route('/api/products', methods=['POST'])
 def create_product() -> tuple:
     """Create a new product with associated inventory.
     
     This endpoint creates a new product and its initial inventory record in a single
-    atomic transaction. It validates the input data using Marshmallow schema and
+    atomic transaction. It validates the input data using a pydantic model and
     ensures data consistency.
     
     Returns:
@@ -111,68 +157,57 @@ def create_product() -> tuple:
                - response_json: Contains success status, data/error message
                - status_code: HTTP status code
     """
-    logger.info("Processing new product creation request")
-    
-    # Check if request has JSON data
-    if not request.json:
+    # Check if request has a body at all
+    body = request.get_data()
+    if not body:
         logger.error("No JSON data provided in request")
         return create_response(
             success=False,
             error="No JSON data provided",
             status_code=HTTP_400_BAD_REQUEST
         )
-    
-    try:
-        # Validate input data using schema - this will raise ValidationError if invalid
-        data = product_schema.load(request.json)
-        logger.info("Input validation passed")
-        
-        # Perform DB operations atomically
-        with db.session.begin():
-            product = Product(
-                name=data['name'],
-                sku=data['sku'],
-                price=data['price'],
-                supplier_id=data.get('supplier_id')
-            )
-            db.session.add(product)
-            db.session.flush()  # assign product.id
-            
-            inventory = Inventory(
-                product_id=product.id,
-                warehouse_id=data['warehouse_id'],
-                quantity=data['initial_quantity']
-            )
-            db.session.add(inventory)
-            
-        logger.info(f"Successfully created product with ID: {product.id}")
-        return create_response(
-            success=True,
-            data={"product_id": product.id},
-            status_code=HTTP_201_CREATED
+
+    # Parse + validate the raw bytes in one pass; on ValidationError /
+    # IntegrityError the registered errorhandlers build the response, so
+    # the happy path carries no try/except bookkeeping of its own
+    data = ProductIn.model_validate_json(body)
+
+    # Two Core INSERTs in one transaction; RETURNING hands back the new
+    # product id without the unit-of-work flush and identity-map
+    # bookkeeping of mapped instances
+    product_id = db.session.execute(
+        insert(Product)
+        .values(
+            name=data.name,
+            sku=data.sku,
+            price=data.price,
+            supplier_id=data.supplier_id
         )
-        
-    except ValidationError as e:
-        logger.error(f"Validation error during product creation: {e.messages}")
-        return create_response(
-            success=False,
-            error=f"Validation failed: {e.messages}",
-            status_code=HTTP_400_BAD_REQUEST
+        .returning(Product.id)
+    ).scalar_one()
+    db.session.execute(
+        insert(Inventory).values(
+            product_id=product_id,
+            warehouse_id=data.warehouse_id,
+            quantity=data.initial_quantity
         )
-    except IntegrityError as e:
-        db.session.rollback()
-        logger.error(f"Database integrity error: {str(e)}")
-        if 'UNIQUE constraint' in str(e.orig) or 'duplicate key' in str(e.orig):
-            return create_response(False, error=ERROR_SKU_EXISTS, status_code=HTTP_400_BAD_REQUEST)
-        return create_response(False, error=ERROR_DATABASE, status_code=HTTP_500_INTERNAL_SERVER_ERROR)
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Unexpected error during product creation: {str(e)}")
-        return create_response(False, error=ERROR_DATABASE, status_code=HTTP_500_INTERNAL_SERVER_ERROR)
+    )
+    db.session.commit()
+
+    # Lazy %s formatting: the string is only built if INFO is enabled
+    logger.info("Successfully created product id=%s", product_id)
+    return create_response(
+        success=True,
+        data={"product_id": product_id},
+        status_code=HTTP_201_CREATED
+    )
 
 # Create database tables
 with app.app_context():
+    event.listen(db.engine, "connect", set_sqlite_pragmas)
     db.create_all()
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Serve requests on concurrent threads; the pooled engine and WAL mode
+    # let handlers overlap their DB waits instead of queueing per request
+    app.run(debug=True, threaded=True)
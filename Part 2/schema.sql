@@ -32,6 +32,7 @@ CREATE TABLE products (
     price DECIMAL(10,2) NOT NULL CHECK (price >= 0),
     supplier_id INT,
     is_bundle BOOLEAN DEFAULT FALSE,
+    recent_sales_30d INT NOT NULL DEFAULT 0,  -- running total, see trg_sale_ai
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE,
     FOREIGN KEY (supplier_id) REFERENCES suppliers(id)
@@ -85,3 +86,19 @@ CREATE TABLE sales (
     FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
     FOREIGN KEY (warehouse_id) REFERENCES warehouses(id)
 );
+
+-- Keep products.recent_sales_30d current as sales arrive; a nightly job
+-- should recompute it over the true 30-day window to correct drift:
+--   UPDATE products SET recent_sales_30d = (
+--       SELECT COALESCE(SUM(quantity), 0) FROM sales
+--       WHERE product_id = products.id
+--         AND sold_at >= DATE_SUB(CURRENT_DATE, INTERVAL 30 DAY));
+CREATE TRIGGER trg_sale_ai AFTER INSERT ON sales
+FOR EACH ROW
+    UPDATE products SET recent_sales_30d = recent_sales_30d + NEW.quantity
+    WHERE id = NEW.product_id;
+
+-- Indexes for the low-stock alerts hot path
+CREATE INDEX ix_warehouse_company ON warehouses (company_id);
+CREATE INDEX ix_inventory_warehouse_product ON inventory (warehouse_id, product_id);
+CREATE INDEX ix_sale_soldat_product ON sales (sold_at, product_id);
@@ -1,14 +1,55 @@
-from flask import Flask, jsonify, request
+from flask import Flask, request, Response
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func
+import orjson
+from sqlalchemy import case, event, func, DDL
+from sqlalchemy.pool import QueuePool
 from datetime import date, timedelta
+import hashlib
+import time
 
 # Initialize Flask app and database
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///inventory.db'  # or your DB URI
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Keep a pool of open SQLite connections instead of opening/closing the
+# database file on every request
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'poolclass': QueuePool,
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_pre_ping': True,
+    'connect_args': {'check_same_thread': False},
+}
 db = SQLAlchemy(app)
 
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Enable WAL and relaxed sync on each pooled connection so readers
+    and the writer don't serialize on the database file."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")
+    cursor.close()
+
+with app.app_context():
+    event.listen(db.engine, "connect", set_sqlite_pragmas)
+
+def json_response(payload, status=200):
+    """Serialize with orjson (C encoder, bytes output) instead of jsonify."""
+    return Response(
+        orjson.dumps(payload, option=orjson.OPT_NAIVE_UTC),
+        status=status,
+        mimetype='application/json'
+    )
+
+# In-process response cache for the alerts endpoint: company_id ->
+# (etag, serialized body, expiry). The ETag is derived from the latest
+# inventory update and sale id, so repeat polls cost one small aggregate
+# query instead of the full alerts join.
+ALERTS_CACHE_TTL = 5  # seconds
+_alerts_cache = {}
+
 # Model definitions (matching Part 2 schema exactly)
 class Company(db.Model):
     __tablename__ = 'companies'
@@ -25,6 +66,7 @@ class Warehouse(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('company_id', 'name', name='unique_company_warehouse'),
+        db.Index('ix_warehouse_company', 'company_id'),
     )
 
 class Supplier(db.Model):
@@ -43,6 +85,9 @@ class Product(db.Model):
     price = db.Column(db.DECIMAL(10, 2), nullable=False)
     supplier_id = db.Column(db.Integer, db.ForeignKey('suppliers.id'))
     is_bundle = db.Column(db.Boolean, default=False)
+    # Running 30-day sales total, bumped by trigger on each sale and
+    # recomputed by the refresh-recent-sales job to correct drift
+    recent_sales_30d = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.TIMESTAMP, default=db.func.current_timestamp())
     
     __table_args__ = (
@@ -60,6 +105,9 @@ class Inventory(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('product_id', 'warehouse_id', name='unique_product_warehouse'),
+        # The unique constraint indexes (product_id, warehouse_id); the
+        # reverse order serves warehouse-driven lookups in the alerts query
+        db.Index('ix_inventory_warehouse_product', 'warehouse_id', 'product_id'),
         db.CheckConstraint('quantity >= 0'),
         db.CheckConstraint('min_stock >= 0'),
     )
@@ -96,16 +144,86 @@ class Sale(db.Model):
     
     __table_args__ = (
         db.CheckConstraint('quantity > 0'),
+        # Covers the date-range filter + per-product aggregation in alerts
+        db.Index('ix_sale_soldat_product', 'sold_at', 'product_id'),
+    )
+
+# Keep products.recent_sales_30d current as sales arrive (SQLite trigger;
+# the Part 2 schema carries the MySQL equivalent)
+event.listen(
+    Sale.__table__,
+    'after_create',
+    DDL("""
+        CREATE TRIGGER IF NOT EXISTS trg_sale_ai AFTER INSERT ON sales
+        BEGIN
+            UPDATE products SET recent_sales_30d = recent_sales_30d + NEW.quantity
+            WHERE id = NEW.product_id;
+        END
+    """)
+)
+
+def refresh_recent_sales():
+    """Recompute products.recent_sales_30d over the true 30-day window.
+
+    The insert trigger only ever adds, so totals drift upwards as sales age
+    out of the window; run this nightly to correct them.
+    """
+    since_date = date.today() - timedelta(days=30)
+    window_total = (
+        db.session.query(func.coalesce(func.sum(Sale.quantity), 0))
+        .filter(Sale.product_id == Product.id, Sale.sold_at >= since_date)
+        .scalar_subquery()
+    )
+    db.session.query(Product).update(
+        {Product.recent_sales_30d: window_total}, synchronize_session=False
     )
+    db.session.commit()
+
+@app.cli.command('refresh-recent-sales')
+def refresh_recent_sales_command():
+    """CLI entry point for the nightly recent-sales refresh."""
+    refresh_recent_sales()
 
 @app.route('/api/companies/<int:company_id>/alerts/low-stock', methods=['GET'])
 def low_stock_alerts(company_id):
     try:
-        # Validate company exists
-        company = db.session.query(Company).filter_by(id=company_id).first()
+        # Validate company exists (id only - no need to hydrate the entity)
+        company = db.session.query(Company.id).filter_by(id=company_id).first()
         if not company:
-            return jsonify({"error": "Company not found"}), 404
-        
+            return json_response({"error": "Company not found"}, status=404)
+
+        # Cheap change marker for this company's alert data: latest
+        # inventory update and latest sale id
+        last_inventory_update = (
+            db.session.query(func.max(Inventory.updated_at))
+            .join(Warehouse, Inventory.warehouse_id == Warehouse.id)
+            .filter(Warehouse.company_id == company_id)
+            .scalar_subquery()
+        )
+        last_sale_id = (
+            db.session.query(func.max(Sale.id))
+            .join(Product, Sale.product_id == Product.id)
+            .filter(Product.company_id == company_id)
+            .scalar_subquery()
+        )
+        marker = db.session.query(last_inventory_update, last_sale_id).one()
+        etag = hashlib.md5(repr((company_id, *marker)).encode()).hexdigest()
+
+        # Client already has this version
+        if etag in request.if_none_match:
+            not_modified = Response(status=304)
+            not_modified.set_etag(etag)
+            return not_modified
+
+        # Serve the cached body while it is fresh and the data unchanged
+        cached = _alerts_cache.get(company_id)
+        now = time.monotonic()
+        if cached and cached[0] == etag and cached[2] > now:
+            response = Response(cached[1], mimetype='application/json')
+            response.set_etag(etag)
+            return response
+
+
         # Define threshold by product type
         threshold_by_type = {
             'standard': 20,
@@ -113,92 +231,102 @@ def low_stock_alerts(company_id):
             # add more types if needed
         }
         recent_days = 30
-        since_date = date.today() - timedelta(days=recent_days)
 
-        alerts = []
-        
-        # First, get all recent sales data for this company's products in one query
-        # This avoids N+1 query problem
-        recent_sales = (
+        # Threshold depends on product type; express it as a SQL CASE so the
+        # DB can filter on it directly
+        threshold_expr = case(
+            (Product.is_bundle, threshold_by_type['bundle']),
+            else_=threshold_by_type['standard']
+        )
+
+        # Single query: join inventory, product and warehouse and push both
+        # filters (recent sales via the materialized total, stock below
+        # threshold) into SQL. The DB returns only the columns needed for
+        # the JSON, one row per alert.
+        rows = (
             db.session.query(
-                Sale.product_id,
-                func.sum(Sale.quantity).label('total_sales')
+                Product.id.label('product_id'),
+                Product.name.label('product_name'),
+                Product.sku.label('sku'),
+                Warehouse.id.label('warehouse_id'),
+                Warehouse.name.label('warehouse_name'),
+                Inventory.quantity.label('current_stock'),
+                threshold_expr.label('threshold'),
+                # days of stock left at the recent average daily sales rate;
+                # floor division matches the old int(quantity / daily_avg)
+                (Inventory.quantity * recent_days //
+                 func.nullif(Product.recent_sales_30d, 0)).label('days_until_stockout'),
+                Product.supplier_id.label('supplier_id'),
             )
-            .join(Product, Sale.product_id == Product.id)
-            .join(Inventory, Product.id == Inventory.product_id)
+            .select_from(Inventory)
+            .join(Product, Inventory.product_id == Product.id)
             .join(Warehouse, Inventory.warehouse_id == Warehouse.id)
             .filter(
                 Warehouse.company_id == company_id,
-                Sale.sold_at >= since_date
+                # materialized running total replaces the per-request
+                # aggregation over the sales table
+                Product.recent_sales_30d > 0,
+                Inventory.quantity < threshold_expr
             )
-            .group_by(Sale.product_id)
-            .all()
-        )
-        
-        # Create a lookup dictionary for sales data
-        sales_lookup = {product_id: total_sales for product_id, total_sales in recent_sales}
-        
-        # Query inventory records for this company via warehouses
-        inventories = (
-            db.session.query(Inventory, Product, Warehouse, Supplier)
-            .join(Product, Inventory.product_id == Product.id)
-            .join(Warehouse, Inventory.warehouse_id == Warehouse.id)
-            .outerjoin(Supplier, Product.supplier_id == Supplier.id)
-            .filter(Warehouse.company_id == company_id)
-            .all()
+            # Stream rows in batches instead of materializing the whole
+            # result set; each row is a lightweight named tuple
+            .yield_per(500)
         )
 
-        for inventory, product, warehouse, supplier in inventories:
-            # Only consider products with recent sales
-            sales_sum = sales_lookup.get(product.id, 0)
-            if sales_sum == 0:
-                continue  # No recent sales, skip
-
-            # Compute average daily sales over the period
-            daily_avg = sales_sum / recent_days
-
-            # Determine threshold for this product
-            # Assume product type stored as a string field, default to 'standard'
-            ptype = 'bundle' if product.is_bundle else 'standard'
-            threshold = threshold_by_type.get(ptype, threshold_by_type['standard'])
-
-            current_qty = inventory.quantity
-            if current_qty >= threshold:
-                continue  # No alert if stock is above threshold
-
-            # Calculate days until stockout, avoid division by zero
-            days_until_stockout = int(current_qty / daily_avg) if daily_avg > 0 else None
-
-            # Build alert entry
-            alert = {
-                "product_id": product.id,
-                "product_name": product.name,
-                "sku": product.sku,
-                "warehouse_id": warehouse.id,
-                "warehouse_name": warehouse.name,
-                "current_stock": current_qty,
-                "threshold": threshold,
-                "days_until_stockout": days_until_stockout,
-                "supplier": {
-                    "id": supplier.id if supplier else None,
-                    "name": supplier.name if supplier else None,
-                    "contact_email": supplier.contact_email if supplier else None
-                }
+        # Single streaming pass: a branch-free comprehension builds the alert
+        # dicts, carrying supplier_id as a placeholder resolved below
+        alerts = [
+            {
+                "product_id": row.product_id,
+                "product_name": row.product_name,
+                "sku": row.sku,
+                "warehouse_id": row.warehouse_id,
+                "warehouse_name": row.warehouse_name,
+                "current_stock": row.current_stock,
+                "threshold": row.threshold,
+                "days_until_stockout": row.days_until_stockout,
+                "supplier": row.supplier_id
             }
-            alerts.append(alert)
+            for row in rows
+        ]
 
-        response = {
+        # Fetch the distinct suppliers for the alert rows in one IN query
+        # rather than outer-joining supplier columns onto every row
+        supplier_ids = {a["supplier"] for a in alerts if a["supplier"] is not None}
+        suppliers = {}
+        if supplier_ids:
+            suppliers = {
+                s.id: s
+                for s in db.session.query(Supplier).filter(Supplier.id.in_(supplier_ids))
+            }
+
+        # Swap the placeholder ids for the supplier details; products without
+        # a supplier get null instead of a dict of three nulls
+        for alert in alerts:
+            supplier = suppliers.get(alert["supplier"])
+            alert["supplier"] = {
+                "id": supplier.id,
+                "name": supplier.name,
+                "contact_email": supplier.contact_email
+            } if supplier else None
+
+        body = orjson.dumps({
             "alerts": alerts,
             "total_alerts": len(alerts)
-        }
-        return jsonify(response), 200
+        })
+        _alerts_cache[company_id] = (etag, body, now + ALERTS_CACHE_TTL)
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
         # Log the error in production
-        return jsonify({"error": "Internal server error"}), 500
+        return json_response({"error": "Internal server error"}, status=500)
 
 # Add a simple app runner for testing
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()  # Create tables if they don't exist
-    app.run(debug=True)
+    # Serve requests on concurrent threads; the pooled engine and WAL mode
+    # let handlers overlap their DB waits instead of queueing per request
+    app.run(debug=True, threaded=True)
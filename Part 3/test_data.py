@@ -1,5 +1,6 @@
 from app import db, Company, Warehouse, Supplier, Product, Inventory, Sale
 from datetime import date, timedelta
+from sqlalchemy import insert
 import random
 
 def create_test_data():
@@ -62,46 +63,27 @@ def create_test_data():
         db.session.add_all(products)
         db.session.flush()
 
-        # Create inventory records
+        # Create inventory records as a single multi-row INSERT; plain dicts
+        # skip the per-instance ORM state tracking that add_all incurs
         inventories = [
             # Low stock for Widget A in Main Warehouse
-            Inventory(
-                product_id=products[0].id,
-                warehouse_id=warehouse1.id,
-                quantity=5,
-                min_stock=10
-            ),
+            dict(product_id=products[0].id, warehouse_id=warehouse1.id, quantity=5, min_stock=10),
             # Normal stock for Widget A in Secondary Warehouse
-            Inventory(
-                product_id=products[0].id,
-                warehouse_id=warehouse2.id,
-                quantity=50,
-                min_stock=10
-            ),
+            dict(product_id=products[0].id, warehouse_id=warehouse2.id, quantity=50, min_stock=10),
             # Low stock for Widget B (bundle) in Main Warehouse
-            Inventory(
-                product_id=products[1].id,
-                warehouse_id=warehouse1.id,
-                quantity=8,
-                min_stock=5
-            ),
+            dict(product_id=products[1].id, warehouse_id=warehouse1.id, quantity=8, min_stock=5),
             # High stock for Widget C in Main Warehouse
-            Inventory(
-                product_id=products[2].id,
-                warehouse_id=warehouse1.id,
-                quantity=100,
-                min_stock=20
-            )
+            dict(product_id=products[2].id, warehouse_id=warehouse1.id, quantity=100, min_stock=20)
         ]
-        db.session.add_all(inventories)
+        db.session.execute(insert(Inventory), inventories)
 
-        # Create sales records for the last 30 days
+        # Create sales records for the last 30 days, bulk-inserted the same way
         today = date.today()
         sales = []
-        
+
         # Widget A - regular sales activity
         for i in range(30):
-            sales.append(Sale(
+            sales.append(dict(
                 product_id=products[0].id,
                 warehouse_id=warehouse1.id,
                 quantity=random.randint(1, 3),
@@ -110,7 +92,7 @@ def create_test_data():
 
         # Widget B - less frequent sales
         for i in range(0, 30, 2):  # every other day
-            sales.append(Sale(
+            sales.append(dict(
                 product_id=products[1].id,
                 warehouse_id=warehouse1.id,
                 quantity=random.randint(1, 2),
@@ -119,14 +101,14 @@ def create_test_data():
 
         # Widget C - high volume sales
         for i in range(30):
-            sales.append(Sale(
+            sales.append(dict(
                 product_id=products[2].id,
                 warehouse_id=warehouse1.id,
                 quantity=random.randint(3, 5),
                 sold_at=today - timedelta(days=i)
             ))
 
-        db.session.add_all(sales)
+        db.session.execute(insert(Sale), sales)
 
 if __name__ == '__main__':
     from app import app